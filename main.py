@@ -1,17 +1,28 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Response
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Response, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import io
 import json
+import time
+import uuid
+import asyncio
+import hashlib
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+from collections import Counter, OrderedDict
 from datetime import datetime
 import magic
 from PIL import Image
 import zipfile
 import csv
-from typing import Optional, List
+from typing import Optional, List, Iterator, Callable
 import mimetypes
 
 app = FastAPI(title="MIME Types Demo API", version="1.0.0")
@@ -28,12 +39,134 @@ app.add_middleware(
 
 # Create directories
 os.makedirs("uploads", exist_ok=True)
+os.makedirs("uploads/thumbnails", exist_ok=True)
 os.makedirs("static/images", exist_ok=True)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+# RESPONSE CACHE
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "5"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+class ResponseCache:
+    """In-memory LRU cache of rendered response bodies
+
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted once the stored bodies exceed ``max_bytes``. Concurrent misses for
+    the same key share a single render.
+    """
+
+    def __init__(self, name: str, ttl: float, max_bytes: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (body, stored_at)
+        self._inflight = {}  # key -> render task
+        self.counters = dict.fromkeys(
+            ("hits", "misses", "collapsed", "evictions", "expirations", "uncacheable"), 0
+        )
+
+    def make_key(self, request: Request, query_params: tuple = ()) -> tuple:
+        """Key on route path and the query parameters the route declares
+
+        Other parameters (e.g. ``?_=<timestamp>`` cache-busters) do not change
+        the output, so they are ignored rather than each getting an entry.
+        Cached routes render the same bytes regardless of request headers, so
+        headers are left out of the key and no Vary header is needed.
+        """
+        query = tuple(
+            (name, value) for name, value in sorted(request.query_params.multi_items())
+            if name in query_params
+        )
+        return (request.url.path, query)
+
+    def _discard(self, key):
+        body, _ = self._entries.pop(key)
+        self.current_bytes -= len(body)
+
+    def _lookup(self, key) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] >= self.ttl:
+            self._discard(key)
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            self.counters["uncacheable"] += 1
+            return
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (body, time.monotonic())
+        self.current_bytes += len(body)
+        while self.current_bytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _render_done(self, key, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, task.result())
+
+    async def respond(self, request: Request, render: Callable[[], bytes],
+                      media_type: str, headers: Optional[dict] = None,
+                      query_params: tuple = ()) -> Response:
+        """Serve a cached body or render it in the threadpool on a miss
+
+        ``query_params`` lists the query parameters that affect ``render``;
+        only those become part of the cache key.
+        """
+        key = self.make_key(request, query_params)
+        response_headers = dict(headers or {})
+        entry = self._lookup(key)
+
+        if entry is not None:
+            self.counters["hits"] += 1
+            body, stored_at = entry
+            age = time.monotonic() - stored_at
+            response_headers["Age"] = str(int(age))
+            response_headers["Cache-Status"] = f"{self.name}; hit; ttl={int(self.ttl - age)}"
+        else:
+            task = self._inflight.get(key)
+            collapsed = task is not None
+            if collapsed:
+                self.counters["collapsed"] += 1
+            else:
+                self.counters["misses"] += 1
+                task = asyncio.ensure_future(run_in_threadpool(render))
+                task.add_done_callback(lambda t: self._render_done(key, t))
+                self._inflight[key] = task
+            # Shield so a disconnecting client does not cancel the shared render
+            body = await asyncio.shield(task)
+            status = f"{self.name}; fwd=miss"
+            if collapsed:
+                status += "; collapsed"
+            elif len(body) <= self.max_bytes:
+                status += "; stored"
+            response_headers["Cache-Status"] = status
+
+        return Response(content=body, media_type=media_type, headers=response_headers)
+
+    def stats(self) -> dict:
+        """Snapshot of counters and current usage"""
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "current_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "inflight": len(self._inflight)
+        }
+
+response_cache = ResponseCache("MIMEDemo", RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES)
+
 # TEXT MIME TYPES
 @app.get("/api/text/plain", response_class=Response)
 async def get_plain_text():
@@ -183,30 +316,110 @@ async def get_json():
     
     return JSONResponse(content=response_data, headers=headers)
 
+# XML HELPERS
+XML_CHUNK_SIZE = 64 * 1024  # Flush generated XML in ~64KB chunks
+XML_MAX_RECORDS = 10_000_000
+XML_MIME_TYPES = {"application/xml", "text/xml"}
+
+def iter_xml_document(records: int = 0, chunk_size: int = XML_CHUNK_SIZE) -> Iterator[bytes]:
+    """Incrementally write the demo XML document, yielding encoded chunks
+
+    Only the current chunk is held in memory, so ``records`` can be large
+    without building an element tree first.
+    """
+    buffer = []
+    buffered = 0
+
+    def write(text: str):
+        nonlocal buffered
+        buffer.append(text)
+        buffered += len(text)
+
+    def drain() -> bytes:
+        nonlocal buffered
+        chunk = "".join(buffer).encode("utf-8")
+        buffer.clear()
+        buffered = 0
+        return chunk
+
+    timestamp = datetime.now().isoformat()
+    write("<?xml version='1.0' encoding='UTF-8'?>\n")
+    write("<message>")
+    write("<title>XML MIME Demo</title>")
+    write("<content>This is XML content served with application/xml</content>")
+    write(f"<metadata><timestamp>{escape(timestamp)}</timestamp><server>FastAPI</server></metadata>")
+
+    if records:
+        write(f"<records count={quoteattr(str(records))}>")
+        for i in range(1, records + 1):
+            write(
+                f"<record id={quoteattr(str(i))}>"
+                f"<name>Record {i}</name>"
+                f"<created>{escape(timestamp)}</created>"
+                f"</record>"
+            )
+            if buffered >= chunk_size:
+                yield drain()
+        write("</records>")
+
+    write("</message>\n")
+    yield drain()
+
+def is_xml_mime(mime_type: str) -> bool:
+    """Check whether a detected MIME type is an XML document"""
+    return mime_type in XML_MIME_TYPES or mime_type.endswith("+xml")
+
+def analyze_xml_file(file_path: str) -> dict:
+    """Report structure of an XML file using iterparse in bounded memory
+
+    Each element is cleared and detached from its parent once its end tag is
+    seen, so memory grows with document depth rather than document size.
+    """
+    root_tag = None
+    namespaces = {}
+    element_counts = Counter()
+    max_depth = 0
+    stack = []
+
+    try:
+        for event, item in ET.iterparse(file_path, events=("start", "end", "start-ns")):
+            if event == "start-ns":
+                prefix, uri = item
+                namespaces[prefix or ""] = uri
+            elif event == "start":
+                if root_tag is None:
+                    root_tag = item.tag
+                element_counts[item.tag] += 1
+                stack.append(item)
+                max_depth = max(max_depth, len(stack))
+            else:
+                stack.pop()
+                item.clear()
+                if stack:
+                    stack[-1].remove(item)
+    except ET.ParseError as e:
+        return {"well_formed": False, "error": str(e)}
+
+    return {
+        "well_formed": True,
+        "root_element": root_tag,
+        "namespaces": namespaces,
+        "total_elements": sum(element_counts.values()),
+        "element_counts": dict(element_counts.most_common()),
+        "max_depth": max_depth
+    }
+
 @app.get("/api/application/xml", response_class=Response)
-async def get_xml():
-    """Serve XML content"""
-    root = ET.Element("message")
-    title = ET.SubElement(root, "title")
-    title.text = "XML MIME Demo"
-    content = ET.SubElement(root, "content")
-    content.text = "This is XML content served with application/xml"
-    
-    # Add metadata
-    metadata = ET.SubElement(root, "metadata")
-    timestamp = ET.SubElement(metadata, "timestamp")
-    timestamp.text = datetime.now().isoformat()
-    server = ET.SubElement(metadata, "server")
-    server.text = "FastAPI"
-    
-    xml_str = ET.tostring(root, encoding='unicode', xml_declaration=True)
-    return Response(content=xml_str, media_type="application/xml")
+async def get_xml(records: int = Query(0, ge=0, le=XML_MAX_RECORDS)):
+    """Serve XML content, optionally with a large generated record set"""
+    return StreamingResponse(
+        iter_xml_document(records),
+        media_type="application/xml"
+    )
 
-@app.get("/api/application/pdf", response_class=Response)
-async def get_pdf():
-    """Serve a simple PDF"""
-    # Create a simple text-based PDF
-    pdf_content = b"""%PDF-1.4
+def render_pdf() -> bytes:
+    """Build a simple text-based PDF"""
+    return b"""%PDF-1.4
 1 0 obj
 <<
 /Type /Catalog
@@ -272,16 +485,19 @@ trailer
 startxref
 534
 %%EOF"""
-    
-    return Response(
-        content=pdf_content,
+
+@app.get("/api/application/pdf", response_class=Response)
+async def get_pdf(request: Request):
+    """Serve a simple PDF"""
+    return await response_cache.respond(
+        request,
+        render_pdf,
         media_type="application/pdf",
         headers={"Content-Disposition": "attachment; filename=demo.pdf"}
     )
 
-@app.get("/api/application/zip", response_class=Response)
-async def get_zip():
-    """Serve a ZIP file"""
+def render_zip() -> bytes:
+    """Build a ZIP archive with a few demo files"""
     zip_buffer = io.BytesIO()
     
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
@@ -300,10 +516,14 @@ async def get_zip():
         html_content = '<html><body><h1>HTML file in ZIP</h1><p>Created with FastAPI</p></body></html>'
         zip_file.writestr('page.html', html_content)
     
-    zip_buffer.seek(0)
-    
-    return StreamingResponse(
-        io.BytesIO(zip_buffer.read()),
+    return zip_buffer.getvalue()
+
+@app.get("/api/application/zip", response_class=Response)
+async def get_zip(request: Request):
+    """Serve a ZIP file"""
+    return await response_cache.respond(
+        request,
+        render_zip,
         media_type="application/zip",
         headers={"Content-Disposition": "attachment; filename=demo.zip"}
     )
@@ -322,9 +542,8 @@ async def get_octet_stream():
     )
 
 # IMAGE MIME TYPES
-@app.get("/api/image/jpeg", response_class=Response)
-async def get_jpeg():
-    """Generate and serve a JPEG image"""
+def render_jpeg() -> bytes:
+    """Generate a JPEG image"""
     # Create a simple image with PIL
     img = Image.new('RGB', (400, 300), color='#FF6B6B')
     
@@ -340,17 +559,20 @@ async def get_jpeg():
     # Convert to JPEG
     img_buffer = io.BytesIO()
     img.save(img_buffer, format='JPEG', quality=95)
-    img_buffer.seek(0)
-    
-    return StreamingResponse(
-        io.BytesIO(img_buffer.read()),
+    return img_buffer.getvalue()
+
+@app.get("/api/image/jpeg", response_class=Response)
+async def get_jpeg(request: Request):
+    """Generate and serve a JPEG image"""
+    return await response_cache.respond(
+        request,
+        render_jpeg,
         media_type="image/jpeg",
         headers={"Content-Disposition": "attachment; filename=demo.jpg"}
     )
 
-@app.get("/api/image/png", response_class=Response)
-async def get_png():
-    """Generate and serve a PNG image"""
+def render_png() -> bytes:
+    """Generate a PNG image"""
     # Create a gradient PNG image
     img = Image.new('RGB', (400, 300), color='#4ECDC4')
     
@@ -367,10 +589,14 @@ async def get_png():
     # Convert to PNG
     img_buffer = io.BytesIO()
     img.save(img_buffer, format='PNG')
-    img_buffer.seek(0)
-    
-    return StreamingResponse(
-        io.BytesIO(img_buffer.read()),
+    return img_buffer.getvalue()
+
+@app.get("/api/image/png", response_class=Response)
+async def get_png(request: Request):
+    """Generate and serve a PNG image"""
+    return await response_cache.respond(
+        request,
+        render_png,
         media_type="image/png",
         headers={"Content-Disposition": "attachment; filename=demo.png"}
     )
@@ -406,9 +632,8 @@ async def get_svg():
     """
     return Response(content=svg_content, media_type="image/svg+xml")
 
-@app.get("/api/image/gif", response_class=Response)
-async def get_gif():
-    """Generate and serve a GIF image"""
+def render_gif() -> bytes:
+    """Generate an animated GIF image"""
     # Create a simple animated GIF
     frames = []
     colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
@@ -431,10 +656,14 @@ async def get_gif():
         duration=500, 
         loop=0
     )
-    gif_buffer.seek(0)
-    
-    return StreamingResponse(
-        io.BytesIO(gif_buffer.read()),
+    return gif_buffer.getvalue()
+
+@app.get("/api/image/gif", response_class=Response)
+async def get_gif(request: Request):
+    """Generate and serve a GIF image"""
+    return await response_cache.respond(
+        request,
+        render_gif,
         media_type="image/gif",
         headers={"Content-Disposition": "attachment; filename=demo.gif"}
     )
@@ -465,53 +694,386 @@ async def get_webm():
         headers={"Content-Disposition": "attachment; filename=demo.webm"}
     )
 
+# UPLOAD PROCESSING PIPELINE
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", str(os.cpu_count() or 2)))
+UPLOAD_STAGE_ATTEMPTS = int(os.getenv("UPLOAD_STAGE_ATTEMPTS", "3"))
+UPLOAD_JOB_HISTORY = int(os.getenv("UPLOAD_JOB_HISTORY", "1000"))
+UPLOAD_READ_CHUNK = 1024 * 1024
+THUMBNAIL_SIZE = (128, 128)
+THUMBNAIL_MODES = ("RGB", "RGBA", "L", "LA", "P")  # Modes PNG can store directly
+EICAR_SIGNATURE = rb"X5O!P%@AP[4\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*"
+JOB_FINISHED = ("completed", "failed")
+# Errors worth retrying (I/O hiccups); anything else fails the same way every time
+RETRYABLE_STAGE_ERRORS = (OSError,)
+# Raised by Pillow for files it cannot decode (UnidentifiedImageError and
+# truncated data are OSErrors)
+UNREADABLE_IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+# name -> fn(file_path, mime_type, options) -> dict, run in registration order
+PIPELINE_STAGES = OrderedDict()
+
+def pipeline_stage(name: str):
+    """Register a post-upload processing stage
+
+    Stages run in worker processes, so they must be module-level functions
+    taking and returning picklable values. Lambdas and nested functions are
+    rejected here rather than failing later inside the pool.
+    """
+    def register(func):
+        if "<" in getattr(func, "__qualname__", ""):
+            raise TypeError(
+                f"Pipeline stage {name!r} must be a module-level function, got {func.__qualname__}"
+            )
+        PIPELINE_STAGES[name] = func
+        return func
+    return register
+
+def is_raster_image(mime_type: str) -> bool:
+    """Check whether a detected MIME type is an image Pillow can decode"""
+    return mime_type.startswith("image/") and mime_type != "image/svg+xml"
+
+@pipeline_stage("sha256")
+def hash_stage(file_path: str, mime_type: str, options: dict) -> dict:
+    """Hash the saved file in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_READ_CHUNK), b""):
+            digest.update(chunk)
+    return {"sha256": digest.hexdigest()}
+
+@pipeline_stage("metadata")
+def metadata_stage(file_path: str, mime_type: str, options: dict) -> dict:
+    """Collect file system metadata, plus dimensions for images"""
+    stat = os.stat(file_path)
+    metadata = {
+        "size": stat.st_size,
+        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        "guessed_type": mimetypes.guess_type(file_path)[0]
+    }
+    if is_raster_image(mime_type):
+        try:
+            with Image.open(file_path) as img:
+                metadata.update({"width": img.width, "height": img.height,
+                                 "format": img.format, "mode": img.mode})
+        except UNREADABLE_IMAGE_ERRORS as e:
+            metadata["image"] = {"skipped": f"Unreadable image ({e})"}
+    return metadata
+
+@pipeline_stage("thumbnail")
+def thumbnail_stage(file_path: str, mime_type: str, options: dict) -> dict:
+    """Write a PNG thumbnail for raster images"""
+    if not is_raster_image(mime_type):
+        return {"skipped": f"Not a raster image ({mime_type})"}
+    name, _ = os.path.splitext(os.path.basename(file_path))
+    thumb_path = f"uploads/thumbnails/{name}.png"
+    try:
+        with Image.open(file_path) as img:
+            img.thumbnail(THUMBNAIL_SIZE)
+            thumb = img.copy() if img.mode in THUMBNAIL_MODES else img.convert("RGBA")
+    except UNREADABLE_IMAGE_ERRORS as e:
+        return {"skipped": f"Unreadable image ({e})"}
+    thumb.save(thumb_path, format="PNG")
+    return {"thumbnail_path": thumb_path}
+
+@pipeline_stage("scan")
+def scan_stage(file_path: str, mime_type: str, options: dict) -> dict:
+    """Virus-scan stand-in that looks for the EICAR test signature"""
+    overlap = len(EICAR_SIGNATURE) - 1
+    tail = b""
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_READ_CHUNK), b""):
+            if EICAR_SIGNATURE in tail + chunk:
+                return {"clean": False, "threat": "EICAR-Test-File"}
+            tail = chunk[-overlap:]
+    return {"clean": True}
+
+@pipeline_stage("xml_analysis")
+def xml_analysis_stage(file_path: str, mime_type: str, options: dict) -> dict:
+    """Report XML structure when the upload asked for it"""
+    if not options.get("analyze_xml"):
+        return {"skipped": "Not requested"}
+    if not is_xml_mime(mime_type):
+        return {"skipped": f"Not an XML document ({mime_type})"}
+    return analyze_xml_file(file_path)
+
+class PipelineUnavailable(RuntimeError):
+    """Raised when the upload pipeline cannot accept new jobs"""
+
+class UploadPipeline:
+    """In-process job queue that runs post-upload stages on a process pool
+
+    Each job runs every registered stage in order on the executor. Stages
+    failing with a retryable error are retried with backoff; any other error
+    fails the stage straight away. Subscribers
+    receive stage and completion events for the jobs they follow.
+    """
+
+    def __init__(self, stages: OrderedDict, workers: int, attempts: int, history: int):
+        self.stages = stages
+        self.workers = workers
+        self.attempts = attempts
+        self.history = history
+        self.jobs = OrderedDict()  # job_id -> job state
+        self.queue = None
+        self.busy_workers = 0
+        self.stage_timings = {}
+        self.pool_restarts = 0
+        self._executor = None
+        self._tasks = []
+        self._subscribers = {}  # job_id -> [asyncio.Queue]
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Stages are CPU-bound Python (e.g. iterparse), so keep them off this
+        # process's GIL; spawn avoids forking a process that already has threads
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _replace_broken_executor(self, broken: ProcessPoolExecutor):
+        """Swap in a fresh pool after a worker process died
+
+        Several stages can see the same broken pool, so only the first one to
+        report it replaces it.
+        """
+        if self._executor is broken:
+            self.pool_restarts += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._executor = self._new_executor()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        if self._executor is None:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.queue = None
+
+    def check_accepting(self):
+        """Raise PipelineUnavailable unless a new job can be queued
+
+        Finished jobs are dropped oldest first to make room; if every tracked
+        job is still queued or running the pipeline is at capacity, which
+        keeps ``self.jobs`` within ``history`` entries.
+        """
+        if self.queue is None:
+            raise PipelineUnavailable("Upload pipeline is not running")
+        self._trim_history()
+        if len(self.jobs) >= self.history:
+            raise PipelineUnavailable(
+                f"Upload pipeline is at capacity ({len(self.jobs)} unfinished jobs)"
+            )
+
+    def submit(self, file_path: str, filename: str, mime_type: str, options: Optional[dict] = None) -> dict:
+        """Queue a saved upload for processing and return its job state"""
+        self.check_accepting()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "filename": filename,
+            "saved_path": file_path,
+            "mime_type": mime_type,
+            "options": options or {},
+            "created": datetime.now().isoformat(),
+            "started": None,
+            "finished": None,
+            "stages": {name: {"status": "pending"} for name in self.stages}
+        }
+        self.jobs[job["job_id"]] = job
+        self.queue.put_nowait(job)
+        return job
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        events = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id, [])
+        if events in subscribers:
+            subscribers.remove(events)
+        if not subscribers:
+            self._subscribers.pop(job_id, None)
+
+    def metrics(self) -> dict:
+        """Queue depth, worker usage, job counts and per-stage timing"""
+        stages = {}
+        for name, timing in self.stage_timings.items():
+            stages[name] = {
+                **timing,
+                "avg_ms": round(timing["total_ms"] / timing["runs"], 3) if timing["runs"] else 0
+            }
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "workers": self.workers,
+            "busy_workers": self.busy_workers,
+            "pool_restarts": self.pool_restarts,
+            "jobs": dict(Counter(job["status"] for job in self.jobs.values())),
+            "stages": stages
+        }
+
+    def _trim_history(self):
+        # Leave room for one more job
+        excess = len(self.jobs) - self.history + 1
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in JOB_FINISHED]
+        for job_id in finished[:excess]:
+            del self.jobs[job_id]
+
+    def _publish(self, job_id: str, event: str, data: dict):
+        for events in self._subscribers.get(job_id, []):
+            events.put_nowait((event, data))
+
+    def _record_timing(self, name: str, duration_ms: float, failed: bool):
+        timing = self.stage_timings.setdefault(
+            name, {"runs": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        timing["runs"] += 1
+        timing["failures"] += failed
+        timing["total_ms"] = round(timing["total_ms"] + duration_ms, 3)
+        timing["max_ms"] = max(timing["max_ms"], duration_ms)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            self.busy_workers += 1
+            try:
+                await self._process(job)
+            finally:
+                self.busy_workers -= 1
+                self.queue.task_done()
+
+    async def _run_stage(self, job: dict, name: str, func: Callable) -> dict:
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, self.attempts + 1):
+            started = time.perf_counter()
+            executor = self._executor
+            try:
+                result = await loop.run_in_executor(
+                    executor, func, job["saved_path"], job["mime_type"], job["options"]
+                )
+            except Exception as e:
+                duration_ms = round((time.perf_counter() - started) * 1000, 3)
+                self._record_timing(name, duration_ms, failed=True)
+                retryable = isinstance(e, RETRYABLE_STAGE_ERRORS)
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died (OOM kill, native crash); retry on a new pool
+                    self._replace_broken_executor(executor)
+                    retryable = True
+                if attempt == self.attempts or not retryable:
+                    return {"status": "failed", "attempts": attempt,
+                            "duration_ms": duration_ms, "error": str(e)}
+                await asyncio.sleep(0.1 * 2 ** (attempt - 1))
+            else:
+                duration_ms = round((time.perf_counter() - started) * 1000, 3)
+                self._record_timing(name, duration_ms, failed=False)
+                return {"status": "completed", "attempts": attempt,
+                        "duration_ms": duration_ms, "result": result}
+
+    async def _process(self, job: dict):
+        job["status"] = "running"
+        job["started"] = datetime.now().isoformat()
+        self._publish(job["job_id"], "started", {"job_id": job["job_id"], "status": "running"})
+
+        for name, func in self.stages.items():
+            job["stages"][name] = {"status": "running"}
+            job["stages"][name] = await self._run_stage(job, name, func)
+            self._publish(job["job_id"], "stage", {"job_id": job["job_id"], "stage": name, **job["stages"][name]})
+
+        failed = any(stage["status"] == "failed" for stage in job["stages"].values())
+        job["status"] = "failed" if failed else "completed"
+        job["finished"] = datetime.now().isoformat()
+        self._publish(job["job_id"], job["status"], job)
+
+upload_pipeline = UploadPipeline(PIPELINE_STAGES, UPLOAD_WORKERS, UPLOAD_STAGE_ATTEMPTS, UPLOAD_JOB_HISTORY)
+
+@app.on_event("startup")
+async def start_upload_pipeline():
+    upload_pipeline.start()
+
+@app.on_event("shutdown")
+async def stop_upload_pipeline():
+    await upload_pipeline.stop()
+
+def save_upload(upload: UploadFile) -> tuple:
+    """Copy an upload to disk in chunks and fsync it before queuing
+
+    Returns the saved path, the number of bytes written and the MIME type
+    libmagic detects from the saved file, so the upload is never held in memory.
+    """
+    file_path = f"uploads/{datetime.now().timestamp()}_{upload.filename}"
+    upload.file.seek(0)
+    with open(file_path, "wb") as f:
+        shutil.copyfileobj(upload.file, f, UPLOAD_READ_CHUNK)
+        f.flush()
+        os.fsync(f.fileno())
+        file_size = f.tell()
+    return file_path, file_size, magic.from_file(file_path, mime=True)
+
+async def save_and_queue(upload: UploadFile, options: dict) -> tuple:
+    """Save an upload and queue it, removing the file if the pipeline refuses it"""
+    upload_pipeline.check_accepting()
+    file_path, file_size, mime_type = await run_in_threadpool(save_upload, upload)
+    try:
+        job = upload_pipeline.submit(file_path, upload.filename, mime_type, options)
+    except PipelineUnavailable:
+        os.remove(file_path)
+        raise
+    return file_path, file_size, mime_type, job
+
 # FILE UPLOAD ENDPOINTS
 @app.post("/api/upload/single", response_class=JSONResponse)
-async def upload_single_file(file: UploadFile = File(...)):
+async def upload_single_file(file: UploadFile = File(...), analyze_xml: bool = Form(False)):
     """Upload a single file and return MIME type information"""
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Detect MIME type
-        mime_type = magic.from_buffer(content, mime=True)
-        
-        # Save file
-        file_path = f"uploads/{datetime.now().timestamp()}_{file.filename}"
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Save file, detect its MIME type and hand the rest to the pipeline
+        file_path, file_size, mime_type, job = await save_and_queue(file, {"analyze_xml": analyze_xml})
         
         return {
             "message": "File uploaded successfully",
             "filename": file.filename,
             "mime_type": mime_type,
-            "file_size": len(content),
+            "file_size": file_size,
             "saved_path": file_path,
+            "job_id": job["job_id"],
+            "job_status_url": f"/api/jobs/{job['job_id']}",
             "timestamp": datetime.now().isoformat(),
             "headers": dict(file.headers)
         }
+    except PipelineUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Upload failed: {str(e)}")
 
 @app.post("/api/upload/multiple", response_class=JSONResponse)
-async def upload_multiple_files(files: List[UploadFile] = File(...)):
+async def upload_multiple_files(files: List[UploadFile] = File(...), analyze_xml: bool = Form(False)):
     """Upload multiple files and return MIME type information"""
+    try:
+        upload_pipeline.check_accepting()
+    except PipelineUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
     results = []
     
     for file in files:
         try:
-            content = await file.read()
-            mime_type = magic.from_buffer(content, mime=True)
-            
-            file_path = f"uploads/{datetime.now().timestamp()}_{file.filename}"
-            with open(file_path, "wb") as f:
-                f.write(content)
+            file_path, file_size, mime_type, job = await save_and_queue(file, {"analyze_xml": analyze_xml})
             
             results.append({
                 "filename": file.filename,
                 "mime_type": mime_type,
-                "file_size": len(content),
-                "saved_path": file_path
+                "file_size": file_size,
+                "saved_path": file_path,
+                "job_id": job["job_id"],
+                "job_status_url": f"/api/jobs/{job['job_id']}"
             })
             
             # Reset file position for next operation
@@ -531,6 +1093,50 @@ async def upload_multiple_files(files: List[UploadFile] = File(...)):
         "timestamp": datetime.now().isoformat()
     }
 
+# JOB ENDPOINTS
+@app.get("/api/jobs/metrics", response_class=JSONResponse)
+async def job_metrics():
+    """Report upload pipeline queue depth and per-stage timing"""
+    return upload_pipeline.metrics()
+
+@app.get("/api/jobs/{job_id}", response_class=JSONResponse)
+async def get_job(job_id: str):
+    """Get the processing status of an uploaded file"""
+    job = upload_pipeline.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Stream job progress as server-sent events until it finishes"""
+    job = upload_pipeline.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    def format_event(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    async def stream(job: dict):
+        events = upload_pipeline.subscribe(job_id)
+        try:
+            yield format_event("snapshot", job)
+            if job["status"] in JOB_FINISHED:
+                return
+            while True:
+                event, data = await events.get()
+                yield format_event(event, data)
+                if event in JOB_FINISHED:
+                    return
+        finally:
+            upload_pipeline.unsubscribe(job_id, events)
+
+    return StreamingResponse(
+        stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 # UTILITY ENDPOINTS
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -567,6 +1173,11 @@ async def headers_demo():
     
     return JSONResponse(content=response_data, headers=headers)
 
+@app.get("/api/cache/stats", response_class=JSONResponse)
+async def cache_stats():
+    """Report response cache hit, miss and eviction counters"""
+    return response_cache.stats()
+
 @app.get("/api/endpoints", response_class=JSONResponse)
 async def get_endpoints():
     """Get all available endpoints"""
@@ -584,7 +1195,7 @@ async def get_endpoints():
             ],
             "application": [
                 {"method": "GET", "path": "/api/application/json", "description": "JSON data"},
-                {"method": "GET", "path": "/api/application/xml", "description": "XML data"},
+                {"method": "GET", "path": "/api/application/xml", "description": "XML data (?records=N streams a large document)"},
                 {"method": "GET", "path": "/api/application/pdf", "description": "PDF document download"},
                 {"method": "GET", "path": "/api/application/zip", "description": "ZIP archive download"},
                 {"method": "GET", "path": "/api/application/octet-stream", "description": "Binary data download"}
@@ -600,13 +1211,19 @@ async def get_endpoints():
                 {"method": "GET", "path": "/api/video/webm", "description": "WebM video placeholder"}
             ],
             "upload": [
-                {"method": "POST", "path": "/api/upload/single", "description": "Upload single file"},
-                {"method": "POST", "path": "/api/upload/multiple", "description": "Upload multiple files"}
+                {"method": "POST", "path": "/api/upload/single", "description": "Upload single file (analyze_xml=true reports XML structure)"},
+                {"method": "POST", "path": "/api/upload/multiple", "description": "Upload multiple files (analyze_xml=true reports XML structure)"}
+            ],
+            "jobs": [
+                {"method": "GET", "path": "/api/jobs/{job_id}", "description": "Post-upload processing status"},
+                {"method": "GET", "path": "/api/jobs/{job_id}/events", "description": "Processing events (text/event-stream)"},
+                {"method": "GET", "path": "/api/jobs/metrics", "description": "Queue depth and per-stage timing"}
             ],
             "utility": [
                 {"method": "GET", "path": "/", "description": "Main demo page"},
                 {"method": "GET", "path": "/api/endpoints", "description": "List all endpoints"},
-                {"method": "GET", "path": "/api/headers-demo", "description": "Headers and CORS demo"}
+                {"method": "GET", "path": "/api/headers-demo", "description": "Headers and CORS demo"},
+                {"method": "GET", "path": "/api/cache/stats", "description": "Response cache counters"}
             ]
         },
         "usage": {
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+from fastapi import Request
+
+import main
+
+
+def make_request(path: str, query: str = "") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": []
+    })
+
+
+def counting_render(body: bytes, delay: float = 0):
+    calls = []
+    lock = threading.Lock()
+
+    def render():
+        with lock:
+            calls.append(1)
+        time.sleep(delay)
+        return body
+
+    return render, calls
+
+
+def test_hit_after_miss():
+    cache = main.ResponseCache("Test", ttl=60, max_bytes=1024)
+    render, calls = counting_render(b"body")
+
+    async def run():
+        first = await cache.respond(make_request("/a"), render, "text/plain")
+        second = await cache.respond(make_request("/a"), render, "text/plain")
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.headers["Cache-Status"] == "Test; fwd=miss; stored"
+    assert second.headers["Cache-Status"].startswith("Test; hit")
+    assert second.body == b"body"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_expiry():
+    cache = main.ResponseCache("Test", ttl=0.05, max_bytes=1024)
+    render, calls = counting_render(b"body")
+
+    async def run():
+        await cache.respond(make_request("/a"), render, "text/plain")
+        await asyncio.sleep(0.1)
+        return await cache.respond(make_request("/a"), render, "text/plain")
+
+    response = asyncio.run(run())
+
+    assert response.headers["Cache-Status"] == "Test; fwd=miss; stored"
+    assert len(calls) == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction_by_bytes():
+    cache = main.ResponseCache("Test", ttl=60, max_bytes=25)
+    render, _ = counting_render(b"x" * 10)
+
+    async def run():
+        await cache.respond(make_request("/a"), render, "text/plain")
+        await cache.respond(make_request("/b"), render, "text/plain")
+        # Touch /a so /b becomes least recently used
+        await cache.respond(make_request("/a"), render, "text/plain")
+        await cache.respond(make_request("/c"), render, "text/plain")
+        return await cache.respond(make_request("/b"), render, "text/plain")
+
+    response = asyncio.run(run())
+
+    assert response.headers["Cache-Status"] == "Test; fwd=miss; stored"
+    stats = cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["current_bytes"] <= 25
+
+
+def test_oversized_body_is_not_stored():
+    cache = main.ResponseCache("Test", ttl=60, max_bytes=4)
+    render, calls = counting_render(b"too large")
+
+    async def run():
+        first = await cache.respond(make_request("/a"), render, "text/plain")
+        await cache.respond(make_request("/a"), render, "text/plain")
+        return first
+
+    first = asyncio.run(run())
+
+    assert first.headers["Cache-Status"] == "Test; fwd=miss"
+    assert len(calls) == 2
+    assert cache.stats()["uncacheable"] == 2
+
+
+def test_concurrent_misses_share_one_render():
+    cache = main.ResponseCache("Test", ttl=60, max_bytes=1024)
+    render, calls = counting_render(b"body", delay=0.1)
+
+    async def run():
+        return await asyncio.gather(*[
+            cache.respond(make_request("/a"), render, "text/plain") for _ in range(10)
+        ])
+
+    responses = asyncio.run(run())
+
+    assert len(calls) == 1
+    statuses = [r.headers["Cache-Status"] for r in responses]
+    assert statuses.count("Test; fwd=miss; stored") == 1
+    assert statuses.count("Test; fwd=miss; collapsed") == 9
+    assert all(r.body == b"body" for r in responses)
+
+
+def test_key_ignores_undeclared_query_params():
+    cache = main.ResponseCache("Test", ttl=60, max_bytes=1024)
+
+    assert cache.make_key(make_request("/a", "_=1")) == cache.make_key(make_request("/a", "_=2"))
+    assert (cache.make_key(make_request("/a", "size=1&_=1"), ("size",))
+            != cache.make_key(make_request("/a", "size=2&_=1"), ("size",)))
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+
+import pytest
+
+import main
+
+
+# Stages run in spawned worker processes, so they live at module level and
+# keep any cross-attempt state on disk via a marker path in options.
+def ok_stage(file_path, mime_type, options):
+    return {"size": os.path.getsize(file_path)}
+
+
+def flaky_stage(file_path, mime_type, options):
+    if not os.path.exists(options["marker"]):
+        open(options["marker"], "w").close()
+        raise OSError("transient")
+    return {"ok": True}
+
+
+def invalid_stage(file_path, mime_type, options):
+    raise ValueError("bad input")
+
+
+def crashing_stage(file_path, mime_type, options):
+    if not os.path.exists(options["marker"]):
+        open(options["marker"], "w").close()
+        os._exit(1)
+    return {"ok": True}
+
+
+def slow_stage(file_path, mime_type, options):
+    import time
+    time.sleep(0.5)
+    return {}
+
+
+def make_pipeline(*stages, history=10):
+    return main.UploadPipeline(
+        OrderedDict((func.__name__, func) for func in stages), workers=1, attempts=3, history=history
+    )
+
+
+async def wait_until_finished(job, timeout=30):
+    for _ in range(int(timeout / 0.05)):
+        if job["status"] in main.JOB_FINISHED:
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"Job did not finish: {job}")
+
+
+@pytest.fixture
+def upload(tmp_path):
+    path = tmp_path / "upload.txt"
+    path.write_bytes(b"hello")
+    return str(path)
+
+
+def test_transient_error_is_retried(upload, tmp_path):
+    async def run():
+        pipeline = make_pipeline(ok_stage, flaky_stage)
+        pipeline.start()
+        try:
+            job = pipeline.submit(upload, "upload.txt", "text/plain", {"marker": str(tmp_path / "flaky")})
+            return await wait_until_finished(job)
+        finally:
+            await pipeline.stop()
+
+    job = asyncio.run(run())
+
+    assert job["status"] == "completed"
+    assert job["stages"]["ok_stage"]["result"] == {"size": 5}
+    assert job["stages"]["flaky_stage"]["attempts"] == 2
+
+
+def test_deterministic_error_fails_without_retry(upload):
+    async def run():
+        pipeline = make_pipeline(invalid_stage, ok_stage)
+        pipeline.start()
+        try:
+            job = pipeline.submit(upload, "upload.txt", "text/plain")
+            return await wait_until_finished(job), pipeline.metrics()
+        finally:
+            await pipeline.stop()
+
+    job, metrics = asyncio.run(run())
+
+    assert job["status"] == "failed"
+    assert job["stages"]["invalid_stage"] == {
+        "status": "failed",
+        "attempts": 1,
+        "duration_ms": job["stages"]["invalid_stage"]["duration_ms"],
+        "error": "bad input"
+    }
+    # Later stages still run
+    assert job["stages"]["ok_stage"]["status"] == "completed"
+    assert metrics["stages"]["invalid_stage"]["failures"] == 1
+
+
+def test_broken_pool_is_replaced(upload, tmp_path):
+    async def run():
+        pipeline = make_pipeline(crashing_stage)
+        pipeline.start()
+        try:
+            job = pipeline.submit(upload, "upload.txt", "text/plain", {"marker": str(tmp_path / "crash")})
+            return await wait_until_finished(job), pipeline.metrics()
+        finally:
+            await pipeline.stop()
+
+    job, metrics = asyncio.run(run())
+
+    assert job["status"] == "completed"
+    assert job["stages"]["crashing_stage"]["attempts"] == 2
+    assert metrics["pool_restarts"] == 1
+
+
+def test_job_events_are_streamed_in_order(upload, monkeypatch):
+    async def run():
+        pipeline = make_pipeline(ok_stage, invalid_stage)
+        monkeypatch.setattr(main, "upload_pipeline", pipeline)
+        pipeline.start()
+        try:
+            job = pipeline.submit(upload, "upload.txt", "text/plain")
+            response = await main.job_events(job["job_id"])
+            return [chunk async for chunk in response.body_iterator]
+        finally:
+            await pipeline.stop()
+
+    chunks = asyncio.run(run())
+
+    events = []
+    for chunk in chunks:
+        event_line, data_line = chunk.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+
+    assert [event for event, _ in events] == ["snapshot", "started", "stage", "stage", "failed"]
+    assert events[0][1]["status"] == "queued"
+    assert [data["stage"] for event, data in events if event == "stage"] == ["ok_stage", "invalid_stage"]
+    assert events[-1][1]["status"] == "failed"
+
+
+def test_submit_requires_started_pipeline(upload):
+    pipeline = make_pipeline(ok_stage)
+
+    with pytest.raises(main.PipelineUnavailable):
+        pipeline.submit(upload, "upload.txt", "text/plain")
+    asyncio.run(pipeline.stop())
+
+
+def test_unfinished_jobs_are_capped_by_history(upload):
+    async def run():
+        pipeline = make_pipeline(slow_stage, history=2)
+        pipeline.start()
+        try:
+            jobs = [pipeline.submit(upload, "upload.txt", "text/plain") for _ in range(2)]
+            with pytest.raises(main.PipelineUnavailable):
+                pipeline.submit(upload, "upload.txt", "text/plain")
+            for job in jobs:
+                await wait_until_finished(job)
+            # Finished jobs make room for new ones
+            pipeline.submit(upload, "upload.txt", "text/plain")
+            return len(pipeline.jobs)
+        finally:
+            await pipeline.stop()
+
+    assert asyncio.run(run()) == 2
+
+
+def test_pipeline_stage_rejects_lambdas():
+    with pytest.raises(TypeError):
+        main.pipeline_stage("lambda")(lambda file_path, mime_type, options: {})
+    assert "lambda" not in main.PIPELINE_STAGES
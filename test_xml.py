@@ -0,0 +1,55 @@
+import xml.etree.ElementTree as ET
+
+import main
+
+
+def test_iter_xml_document_chunks_are_well_formed():
+    chunks = list(main.iter_xml_document(records=200, chunk_size=512))
+
+    assert len(chunks) > 1
+    assert all(isinstance(chunk, bytes) for chunk in chunks)
+    # Chunks are flushed between records, never mid-tag
+    assert all(chunk.rstrip().endswith(b">") for chunk in chunks)
+
+    root = ET.fromstring(b"".join(chunks))
+    records = root.find("records")
+    assert records.get("count") == "200"
+    assert [r.get("id") for r in records] == [str(i) for i in range(1, 201)]
+
+
+def test_iter_xml_document_without_records():
+    root = ET.fromstring(b"".join(main.iter_xml_document()))
+
+    assert root.tag == "message"
+    assert root.findtext("title") == "XML MIME Demo"
+    assert root.find("records") is None
+
+
+def test_analyze_xml_file_reports_structure(tmp_path):
+    path = tmp_path / "doc.xml"
+    path.write_text(
+        '<a:root xmlns:a="urn:a" xmlns="urn:d">'
+        "<item><leaf/></item><item/><a:item/>"
+        "</a:root>"
+    )
+
+    result = main.analyze_xml_file(str(path))
+
+    assert result == {
+        "well_formed": True,
+        "root_element": "{urn:a}root",
+        "namespaces": {"a": "urn:a", "": "urn:d"},
+        "total_elements": 5,
+        "element_counts": {"{urn:d}item": 2, "{urn:a}root": 1, "{urn:d}leaf": 1, "{urn:a}item": 1},
+        "max_depth": 3
+    }
+
+
+def test_analyze_xml_file_reports_parse_errors(tmp_path):
+    path = tmp_path / "broken.xml"
+    path.write_text("<root><open></root>")
+
+    result = main.analyze_xml_file(str(path))
+
+    assert result["well_formed"] is False
+    assert "mismatched tag" in result["error"]